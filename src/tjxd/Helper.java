@@ -203,5 +203,80 @@ public class Helper {
     return fy;
   }
 
+  /**
+   * Applies automatic gain control, y = x/sqrt(smooth(x*x)).
+   * Squared amplitudes are smoothed along the 1st dimension only, so 
+   * each trace is processed in one pass with a scratch array that 
+   * stays in cache.
+   * @param sigma half-width of the exponential smoothing filter.
+   * @param x input array.
+   * @param y output array; may be the same as x.
+   */
+  public void gain(
+    final float sigma, final float[][][] x, final float[][][] y)
+  {
+    final int n3 = x.length;
+    final int n2 = x[0].length;
+    final int n1 = x[0][0].length;
+    final RecursiveExponentialFilter ref = 
+      new RecursiveExponentialFilter(sigma);
+    Parallel.loop(n3,new Parallel.LoopInt() {
+    public void compute(int i3) {
+      float[] g = new float[n1];
+      for (int i2=0; i2<n2; ++i2) {
+        float[] x32 = x[i3][i2];
+        float[] y32 = y[i3][i2];
+        for (int i1=0; i1<n1; ++i1)
+          g[i1] = x32[i1]*x32[i1];
+        ref.apply(g,g);
+        for (int i1=0; i1<n1; ++i1)
+          y32[i1] = x32[i1]/sqrt(g[i1]);
+      }
+    }});
+  }
+
+  /**
+   * Computes b = 1-pow(a,p) in a single pass over the arrays.
+   * @param a input array.
+   * @param p the exponent.
+   * @param b output array; may be the same as a.
+   */
+  public void oneMinusPow(
+    final float[][][] a, final float p, final float[][][] b)
+  {
+    final int n3 = a.length;
+    final int n2 = a[0].length;
+    final int n1 = a[0][0].length;
+    Parallel.loop(n3,new Parallel.LoopInt() {
+    public void compute(int i3) {
+      for (int i2=0; i2<n2; ++i2) {
+        float[] a32 = a[i3][i2];
+        float[] b32 = b[i3][i2];
+        for (int i1=0; i1<n1; ++i1)
+          b32[i1] = 1.0f-pow(a32[i1],p);
+      }
+    }});
+  }
+
+  /**
+   * Returns a subvolume with m2*m3 traces starting at trace (j2,j3).
+   * Traces are not copied; the subvolume shares them with the input.
+   * @param m2 number of traces in 2nd dimension of the subvolume.
+   * @param m3 number of traces in 3rd dimension of the subvolume.
+   * @param j2 index in 2nd dimension of the first trace.
+   * @param j3 index in 3rd dimension of the first trace.
+   * @param f input array.
+   * @return the subvolume.
+   */
+  public float[][][] subcube(
+    int m2, int m3, int j2, int j3, float[][][] f)
+  {
+    float[][][] g = new float[m3][m2][];
+    for (int i3=0; i3<m3; ++i3)
+      for (int i2=0; i2<m2; ++i2)
+        g[i3][i2] = f[i3+j3][i2+j2];
+    return g;
+  }
+
 
 }
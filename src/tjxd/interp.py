@@ -40,6 +40,23 @@ vtfile = "vt"
 epvfile = "epv"
 
 
+# Images read from files, keyed by basename; see readImage3DCached.
+# Every cached image is one full n1*n2*n3 volume, and all of them, 
+# pinned or not, count toward imgCacheSize. When there are more, the 
+# least recently used unpinned images are evicted. Five is the largest
+# set of images used together, those read by loadCube.
+imgCacheSize = 5
+_imgCache = {}
+_imgCacheOrder = [] # basenames, least recently used first
+_imgCachePinned = set()
+_imgReads = {} # number of times each file has been read
+
+# Normal vectors and planarity reused by each call to goFvPlanar.
+_fvScratch = None
+
+# Seismic image after gain; see getGainedGx.
+_gainedGx = None
+
 pngDir = getPngDir()
 pngDir = None
 plotOnly = True
@@ -58,6 +75,7 @@ c3s = [4530909,4532272,4533012,4532232,4530130,4533492,
 
 wns =["YC1","YJ1-3","YJ1-5","YJ1-9X","YJ1X","YJ2-3","YJ2-7X",
       "YJ2-9","YJ2X","YJ3","YJ3-2","YJ3-3H"]
+_wellLoc = dict(zip(wns,zip(c2s,c3s))) # well name -> (c2,c3)
 logDir = "../../../data/seis/tjxd/3d/logs/las/"
 dvtDir = "../../../data/seis/tjxd/3d/logs/dvt/"
 logType = "velocity"
@@ -113,8 +131,7 @@ def gridWellLogs(logType):
   plot3(g,samples=samples)
 
 def goDisplay():
-  gx = readImage3D(gxfile)
-  gx = gain(gx)
+  gx = getGainedGx()
   fk,k1,k2,k3=getLogSamples("velocity")
   samples = fk,k1,k2,k3
   plot3(gx,samples=samples)
@@ -140,59 +157,56 @@ def scaleTensors(eps):
   sx1 = readImage3D(s1file); print "sx1 min =",min(sx1)," max =",max(sx1)
   sx2 = readImage3D(s2file); print "sx2 min =",min(sx2)," max =",max(sx2)
   sx3 = readImage3D(s3file); print "sx3 min =",min(sx3)," max =",max(sx3)
-  pow(sx2,4.0,sx2)
-  fill(eps,sx3)
-  sx1 = clip(eps,1.0,sx1)
-  sx2 = clip(eps,1.0,sx2)
-  sx3 = clip(eps,1.0,sx3)
+  def scale(s1,s2,s3):
+    pow(s2,4.0,s2)
+    fill(eps,s3)
+    clip(eps,1.0,s1,s1)
+    clip(eps,1.0,s2,s2)
+    clip(eps,1.0,s3,s3)
+  parApply(scale,sx1,sx2,sx3)
   ex.setEigenvalues(sx3,sx2,sx1)
   writeTensors(exsfile,ex)
 
+class _SlabLoop(Parallel.LoopInt):
+  def __init__(self,fn,fs):
+    self.fn = fn
+    self.fs = fs
+  def compute(self,i3):
+    self.fn(*[f[i3] for f in self.fs])
+def parApply(fn,*fs):
+  """
+  Applies fn in parallel to the 2D slabs f[i3] of one or more 3D arrays;
+  for each i3, all slabs are processed together by one call to fn.
+  """
+  Parallel.loop(len(fs[0]),_SlabLoop(fn,fs))
+
 def goSemblance():
   mask = ZeroMask(readImage3D(gmfile))
-  '''
-  semblance1(mask)
-  semblance2(mask)
-  semblance3(mask)
-  '''
-  for smfile in [s1file,s2file,s3file]:
-    sm = readImage3D(smfile)
-    if smfile==s3file:
-      mask.apply(0.0001,sm)
-    else:
-      mask.apply(1.00,sm)
-    writeImage(smfile,sm)
+  goSemblanceFused(mask)
 
-def semblance1(mask):
+def goSemblanceFused(mask):
+  """
+  Computes all three semblances from one read of the image and tensors.
+  """
   lsf1 = LocalSemblanceFilter(2,2)
-  ex = readTensors(exfile)
-  gx = readImage3D(gxfile)
-  sx1 = lsf1.semblance(LocalSemblanceFilter.Direction3.W,ex,gx)
-  mask.apply(1.00,sx1)
-  writeImage(s1file,sx1)
-
-def semblance2(mask):
   lsf2 = LocalSemblanceFilter(2,8)
+  lsf3 = LocalSemblanceFilter(16,0)
   ex = readTensors(exfile)
   gx = readImage3D(gxfile)
+  sx1 = lsf1.semblance(LocalSemblanceFilter.Direction3.W,ex,gx)
   sx2 = lsf2.semblance(LocalSemblanceFilter.Direction3.VW,ex,gx)
+  sx3 = lsf3.semblance(LocalSemblanceFilter.Direction3.UVW,ex,gx)
+  mask.apply(1.00,sx1)
   mask.apply(1.00,sx2)
+  mask.apply(0.0001,sx3)
+  writeImage(s1file,sx1)
   writeImage(s2file,sx2)
-
-def semblance3(mask):
-  lsf3 = LocalSemblanceFilter(16,0)
-  ex = readTensors(exfile)
-  gx = readImage3D(gxfile)
-  sx3 = lsf3.semblance(LocalSemblanceFilter.Direction3.UVW,ex,gx)
-  mask.apply(0.01,sx3)
   writeImage(s3file,sx3)
 
-
 def getLogSamples(curve):
-  k1,k2,k3,fk=[],[],[],[]
   wldata = WellLog.Data(logDir, dvtDir)
   logs = wldata.getLogsWith(curve)
-  wi = 0
+  ls,n = [],0
   for log in logs:
     print log.name
     c2,c3 = getLogLocation(log.name)
@@ -203,27 +217,28 @@ def getLogSamples(curve):
       fx = fxs[0]
       x1 = fxs[1]
       if(fx!=None and x1!=None):
-        for k in range(len(fx)):
-          fk.append(fx[k])
-          k1.append(x1[k])
-          k2.append(c2)
-          k3.append(c3)
+        ls.append((fx,x1,c2,c3))
+        n += len(fx)
+  fk,k1,k2,k3 = zerofloat(n),zerofloat(n),zerofloat(n),zerofloat(n)
+  k = 0
+  for fx,x1,c2,c3 in ls:
+    nk = len(fx)
+    System.arraycopy(fx,0,fk,k,nk)
+    System.arraycopy(x1,0,k1,k,nk)
+    Arrays.fill(k2,k,k+nk,c2)
+    Arrays.fill(k3,k,k+nk,c3)
+    k += nk
   return fk,k1,k2,k3
 
 def getLogLocation(name):
-  wi = 0
-  for wni in wns:
-    if(wni==name):
-      return c2s[wi],c3s[wi]
-    wi = wi+1
+  return _wellLoc[name]
 
 def goFaultLikelihood():
-  minPhi,maxPhi = 0,360
-  minTheta,maxTheta = 80,88
-  sigmaPhi,sigmaTheta = 12,40
-  gx = readImage3D(gxfile)
-  gx = gain(gx)
+  gx = getGainedGx()
   if not plotOnly:
+    minPhi,maxPhi = 0,360
+    minTheta,maxTheta = 80,88
+    sigmaPhi,sigmaTheta = 12,40
     sigma1,sigma2,sigma3,pmax = 16.0,1.0,1.0,5.0
     p2,p3,ep = FaultScanner.slopes(sigma1,sigma2,sigma3,pmax,gx)
     gx = FaultScanner.taper(10,0,0,gx)
@@ -232,48 +247,49 @@ def goFaultLikelihood():
     print "fl min =",min(fl)," max =",max(fl)
     print "fp min =",min(fp)," max =",max(fp)
     print "ft min =",min(ft)," max =",max(ft)
-    writeImage(flfile,fl)
-    writeImage(fpfile,fp)
-    writeImage(ftfile,ft)
+    writeImageCached(flfile,fl)
+    writeImageCached(fpfile,fp)
+    writeImageCached(ftfile,ft)
   else:
-    fl = readImage3D(flfile)
+    fl = readImage3DCached(flfile)
   plot3(gx,fl,cmin=0.25,cmax=1.0,cmap=jetRamp(1.0),
       clab="Fault likelihood",png="fl")
 
 def goPlanar():
-  gx = readImage3D(gxfile)
+  gx = readImage3DCached(gxfile)
   if not plotOnly:
     lof = LocalOrientFilter(16,4)
     et3 = lof.applyForTensors(gx)
     et3.setEigenvalues(1.0,0.01,0.5)
     fer = FaultEnhancer(sigmaPhi,sigmaTheta)
     ep = fer.applyForPlanar(10,et3,gx)
-    writeImage(epfile,ep)
+    writeImageCached(epfile,ep)
     print min(ep)
     print max(ep)
   else:
-    ep = readImage3D(epfile)
+    ep = readImage3DCached(epfile)
   #plot3(gx,cmin=-3,cmax=3)
   #plot3(ep,cmin=0.2,cmax=1.0,clab="Planarity",cint=0.1)
-  ep = pow(ep,6)
-  plot3(gx,sub(1,ep),cmin=0.1,cmax=0.8,cmap=jetRamp(1.0),
+  ef = zerofloat(n1,n2,n3) # ep may be cached, so not modified
+  Helper().oneMinusPow(ep,6,ef)
+  plot3(gx,ef,cmin=0.1,cmax=0.8,cmap=jetRamp(1.0),
       clab="1-planarity",png="fl")
 
 def goFaultOrientScan():
-  gx = readImage3D(gxfile)
-  ep = readImage3D(epfile)
-  fos = FaultOrientScanner3(sigmaPhi,sigmaTheta)
+  gx = readImage3DCached(gxfile)
+  ep = readImage3DCached(epfile)
   if not plotOnly:
+    fos = FaultOrientScanner3(sigmaPhi,sigmaTheta)
     fe,fp,ft = fos.scan(minPhi,maxPhi,minTheta,maxTheta,ep)
     fet,fpt,ftt=fos.thin([fe,fp,ft])
-    writeImage(fefile,fe)
-    writeImage(fpfile,fp)
-    writeImage(fetfile,fet)
-    writeImage(fptfile,fpt)
-    writeImage(fttfile,ftt)
+    writeImageCached(fefile,fe)
+    writeImageCached(fpfile,fp)
+    writeImageCached(fetfile,fet)
+    writeImageCached(fptfile,fpt)
+    writeImageCached(fttfile,ftt)
   else:
-    fp = readImage3D(fpfile)
-    fe = readImage3D(fefile)
+    fp = readImage3DCached(fpfile)
+    fe = readImage3DCached(fefile)
   print min(fe) 
   print max(fe) 
   plot3(gx,ep,cmin=0.1,cmax=0.7,cmap=jetRamp(1.0),
@@ -284,40 +300,32 @@ def goFaultOrientScan():
       clab="Fault strike (degrees)",png="fp")
 
 def goSurfaceVoting():
-  gx = readImage3D(gxfile)
+  gx = readImage3DCached(gxfile)
   if not plotOnly:
-    fet = readImage3D(fetfile)
-    fpt = readImage3D(fptfile)
-    ftt = readImage3D(fttfile)
+    fet = readImage3DCached(fetfile)
+    fpt = readImage3DCached(fptfile)
+    ftt = readImage3DCached(fttfile)
     osv = OptimalSurfaceVoterP(10,30,20)
     osv.setStrainMax(0.2,0.2)
     osv.setSurfaceSmoothing(2,2)
     #fv = osv.applyVoting(4,0.3,fet,fpt,ftt)
     fv,vp,vt = osv.applyVoting(4,0.3,fet,fpt,ftt)
-    writeImage("vp",vp)
-    writeImage("vt",vt)
+    writeImageCached(vpfile,vp)
+    writeImageCached(vtfile,vt)
     #writeImage(fvfile,fv)
   else:
-    fv = readImage3D(fvfile)
-  ep = readImage3D(epfile)
-  ep = sub(1,pow(ep,8))
-  plot3(gx,ep,cmin=0.25,cmax=1.0,cmap=jetRamp(1.0),
+    fv = readImage3DCached(fvfile)
+  ep = readImage3DCached(epfile)
+  ef = zerofloat(n1,n2,n3) # ep may be cached, so not modified
+  Helper().oneMinusPow(ep,8,ef)
+  plot3(gx,ef,cmin=0.25,cmax=1.0,cmap=jetRamp(1.0),
       clab="1-planarity",png="ep")
   plot3(gx,fv,cmin=0.25,cmax=1.0,cmap=jetRamp(1.0),
       clab="Surface voting",png="sv")
 
 def showSub1():
-  gx = readImage3D(gxfile)
   osv = OptimalSurfaceVoterP(10,20,30)
-  fv = readImage3D(fvfile)
-  vp = readImage3D(vpfile)
-  vt = readImage3D(vtfile)
-  ep = readImage3D(epvfile)
-  gx = copy(n1,410,500,0,510,324,gx)
-  fv = copy(n1,410,500,0,510,324,fv)
-  vp = copy(n1,410,500,0,510,324,vp)
-  vt = copy(n1,410,500,0,510,324,vt)
-  ep = copy(n1,410,500,0,510,324,ep)
+  gx,fv,vp,vt,ep,dims = loadCube(410,500,510,324)
   ft,pt,tt = osv.thin([fv,vp,vt])
   '''
   fsk = FaultSkinner()
@@ -327,23 +335,14 @@ def showSub1():
     skin.smooth(5)
   plot3(gx,au=140,skinx=skins)
   '''
-  plot3(gx,au=140,png="sub1/seis")
+  plot3(gx,au=140,dims=dims,png="sub1/seis")
   plot3(gx,fv,au=140,cmin=0.3,cmax=1.0,cmap=jetRamp(1.0),
-      clab="Voting score",png="sub1/fv")
+      clab="Voting score",dims=dims,png="sub1/fv")
   plot3(gx,ft,au=140,cmin=0.3,cmax=0.9,cmap=jetRamp(1.0),
-      clab="Voting score",png="sub1/fvt")
+      clab="Voting score",dims=dims,png="sub1/fvt")
 def showSub2():
-  gx = readImage3D(gxfile)
   osv = OptimalSurfaceVoterP(10,20,30)
-  fv = readImage3D(fvfile)
-  vp = readImage3D(vpfile)
-  vt = readImage3D(vtfile)
-  ep = readImage3D(epvfile)
-  gx = copy(n1,360,500,0,150,324,gx)
-  fv = copy(n1,360,500,0,150,324,fv)
-  vp = copy(n1,360,500,0,150,324,vp)
-  vt = copy(n1,360,500,0,150,324,vt)
-  ep = copy(n1,360,500,0,150,324,ep)
+  gx,fv,vp,vt,ep,dims = loadCube(360,500,150,324)
   ft,pt,tt = osv.thin([fv,vp,vt])
   '''
   fsk = FaultSkinner()
@@ -353,24 +352,15 @@ def showSub2():
     skin.smooth(5)
   plot3(gx,au=140,skinx=skins)
   '''
-  plot3(gx,au=140)
+  plot3(gx,au=140,dims=dims)
   plot3(gx,fv,au=140,cmin=0.3,cmax=1.0,cmap=jetRamp(1.0),
-      clab="Surface voting",png="fe")
+      clab="Surface voting",dims=dims,png="fe")
   plot3(gx,ft,au=140,cmin=0.3,cmax=1.0,cmap=jetFillExceptMin(1.0),
-      clab="Surface voting",png="fe")
+      clab="Surface voting",dims=dims,png="fe")
 
 def showSub3():
-  gx = readImage3D(gxfile)
   osv = OptimalSurfaceVoterP(10,20,30)
-  fv = readImage3D(fvfile)
-  vp = readImage3D(vpfile)
-  vt = readImage3D(vtfile)
-  ep = readImage3D(epvfile)
-  gx = copy(n1,410,500,0,510,0,gx)
-  fv = copy(n1,410,500,0,510,0,fv)
-  vp = copy(n1,410,500,0,510,0,vp)
-  vt = copy(n1,410,500,0,510,0,vt)
-  ep = copy(n1,410,500,0,510,0,ep)
+  gx,fv,vp,vt,ep,dims = loadCube(410,500,510,0)
   ft,pt,tt = osv.thin([fv,vp,vt])
   '''
   fsk = FaultSkinner()
@@ -380,21 +370,16 @@ def showSub3():
     skin.smooth(5)
   plot3(gx,au=140,skinx=skins)
   '''
-  plot3(gx,au=140,k2=330,png="sub3/seis")
+  plot3(gx,au=140,k2=330,dims=dims,png="sub3/seis")
   plot3(gx,fv,au=140,k2=330,cmin=0.3,cmax=1.0,cmap=jetRamp(1.0),
-      clab="Voting score",png="sub3/fv")
+      clab="Voting score",dims=dims,png="sub3/fv")
   plot3(gx,ft,au=140,k2=330,cmin=0.3,cmax=0.9,cmap=jetRamp(1.0),
-      clab="Voting score",png="sub3/fvt")
-  plot3f(gx,k2=330,png="sub3/seisf")
-  plot3f(gx,a=ft,k2=330,amin=0.3,amax=1.0,png="sub3/fvtf")
+      clab="Voting score",dims=dims,png="sub3/fvt")
+  plot3f(gx,k2=330,dims=dims,png="sub3/seisf")
+  plot3f(gx,a=ft,k2=330,amin=0.3,amax=1.0,dims=dims,png="sub3/fvtf")
 
 def goSkins():
-  gx = readImage3D(gxfile)
   osv = OptimalSurfaceVoterP(10,20,30)
-  fv = readImage3D(fvfile)
-  vp = readImage3D(vpfile)
-  vt = readImage3D(vtfile)
-  ep = readImage3D(epvfile)
   '''
   gx = copy(n1,400,500,0,100,224,gx)
   fv = copy(n1,400,500,0,100,224,fv)
@@ -416,13 +401,9 @@ def goSkins():
   vt = copy(n1,410,500,0,510,324,vt)
   ep = copy(n1,410,500,0,510,324,ep)
   '''
-  gx = copy(n1,410,500,0,510,0,gx)
-  vp = copy(n1,410,500,0,510,0,vp)
-  vt = copy(n1,410,500,0,510,0,vt)
-  fv = copy(n1,410,500,0,510,0,fv)
-  ep = copy(n1,410,500,0,510,0,ep)
+  gx,fv,vp,vt,ep,dims = loadCube(410,500,510,0)
   ft,pt,tt = osv.thin([fv,vp,vt])
-  plot3(gx,clab="Amplitude",png="seis")
+  plot3(gx,clab="Amplitude",dims=dims,png="seis")
   '''
   plot3(gx,ft,cmin=0.25,cmax=1.0,cmap=jetFillExceptMin(1.0),
       clab="Surface voting",png="fe")
@@ -439,21 +420,107 @@ def goSkins():
   plot3(gx,au=140,k2=330,skinx=skins, png="skinSub3")
   '''
 def goFvPlanar():
-  fv = readImage3D(fvfile)
-  u1 = zerofloat(n1,n2,n3)
-  u2 = zerofloat(n1,n2,n3)
-  u3 = zerofloat(n1,n2,n3)
-  ep = zerofloat(n1,n2,n3)
+  global _fvScratch
+  fv = readImage3DCached(fvfile)
+  if _fvScratch==None:
+    _fvScratch = (zerofloat(n1,n2,n3),zerofloat(n1,n2,n3),
+                  zerofloat(n1,n2,n3),zerofloat(n1,n2,n3))
+  u1,u2,u3,ep = _fvScratch # overwritten by applyForNormalPlanar
   lof = LocalOrientFilter(4,2,2)
   lof.applyForNormalPlanar(fv,u1,u2,u3,ep)
-  writeImage(epvfile,ep)
+  writeImageCached(epvfile,ep)
+
+def readImage3DCached(basename,pin=False):
+  """
+  Reads an image with specified basename only once per session.
+  A pinned image is not evicted from the cache until unpinImages is
+  called for it.
+  """
+  if basename in _imgCache:
+    _imgCacheOrder.remove(basename)
+  else:
+    _imgReads[basename] = _imgReads.get(basename,0)+1
+    print "readImage3D:",basename,"read",_imgReads[basename],"time(s)"
+    _imgCache[basename] = readImage3D(basename)
+  _imgCacheOrder.append(basename)
+  if pin:
+    _imgCachePinned.add(basename)
+  image = _imgCache[basename]
+  evictImages()
+  return image
+
+def writeImageCached(basename,image):
+  """
+  Writes an image and removes any stale copy of it from the cache.
+  """
+  clearImageCache(basename)
+  return writeImage(basename,image)
+
+def clearImageCache(*basenames):
+  """
+  Removes specified images (or all images) from the image cache.
+  """
+  if not basenames:
+    basenames = list(_imgCacheOrder)
+  for basename in basenames:
+    if basename in _imgCache:
+      del _imgCache[basename]
+      _imgCacheOrder.remove(basename)
+    _imgCachePinned.discard(basename)
+
+def unpinImages(*basenames):
+  """
+  Lets specified images be evicted again; they remain cached.
+  """
+  for basename in basenames:
+    _imgCachePinned.discard(basename)
+  evictImages()
+
+def evictImages():
+  """
+  Evicts least recently used unpinned images until no more than 
+  imgCacheSize images remain, or until only pinned images remain.
+  """
+  unpinned = [b for b in _imgCacheOrder if b not in _imgCachePinned]
+  nevict = len(_imgCache)-imgCacheSize
+  if nevict>0:
+    for basename in unpinned[:nevict]:
+      clearImageCache(basename)
+
+def loadCube(m2,m3,j2,j3):
+  """
+  Returns subvolumes of the seismic, fault voting, strike, dip and
+  planarity images, with m2*m3 traces starting at trace (j2,j3), and
+  the dimensions (n1,m2,m3) of those subvolumes.
+  Traces are shared with the cached images and must not be modified.
+  The full images are pinned only while the subvolumes are extracted.
+  Once evicted from the cache, their shared traces stay in memory for
+  as long as the subvolumes do, and that memory is not counted by the
+  cache.
+  """
+  hp = Helper()
+  basenames = [gxfile,fvfile,vpfile,vtfile,epvfile]
+  cube = []
+  for basename in basenames:
+    f = readImage3DCached(basename,pin=True)
+    cube.append(hp.subcube(m2,m3,j2,j3,f))
+  unpinImages(*basenames)
+  cube.append((n1,m2,m3))
+  return tuple(cube)
+
+def getGainedGx():
+  """
+  Returns the gained seismic image, which is computed only once.
+  The returned image is shared and must not be modified.
+  """
+  global _gainedGx
+  if _gainedGx==None:
+    _gainedGx = gain(readImage3D(gxfile))
+  return _gainedGx
 
 def gain(x):
-  g = mul(x,x) 
-  ref = RecursiveExponentialFilter(100.0)
-  ref.apply1(g,g)
   y = zerofloat(n1,n2,n3)
-  div(x,sqrt(g),y)
+  Helper().gain(100.0,x,y)
   return y
 def normalize(e):
   emin = min(e)
@@ -463,26 +530,39 @@ def normalize(e):
 #############################################################################
 # graphics
 
+_cmapCache = {} # color models keyed by (factory name, alpha)
+def _cachedColorModel(factory):
+  def cached(alpha):
+    key = (factory.__name__,alpha)
+    if key not in _cmapCache:
+      _cmapCache[key] = factory(alpha)
+    return _cmapCache[key]
+  cached.__name__ = factory.__name__
+  return cached
+
+@_cachedColorModel
 def jetFill(alpha):
   return ColorMap.setAlpha(ColorMap.JET,alpha)
+@_cachedColorModel
 def jetFillExceptMin(alpha):
   a = fillfloat(alpha,256)
   a[0] = 0.0
   return ColorMap.setAlpha(ColorMap.JET,a)
+@_cachedColorModel
 def jetRamp(alpha):
   return ColorMap.setAlpha(ColorMap.JET,rampfloat(0.0,alpha/256,256))
+@_cachedColorModel
 def bwrFill(alpha):
   return ColorMap.setAlpha(ColorMap.BLUE_WHITE_RED,alpha)
+@_cachedColorModel
 def bwrNotch(alpha):
-  a = zerofloat(256)
-  for i in range(len(a)):
-    if i<128:
-      a[i] = alpha*(128.0-i)/128.0
-    else:
-      a[i] = alpha*(i-127.0)/128.0
+  # alpha*(128-i)/128 for i<128, alpha*(i-127)/128 otherwise
+  a = mul(alpha/128.0,add(abs(sub(rampfloat(0.0,1.0,256),127.5)),0.5))
   return ColorMap.setAlpha(ColorMap.BLUE_WHITE_RED,a)
+@_cachedColorModel
 def hueFill(alpha):
   return ColorMap.getHue(0.0,1.0,alpha)
+@_cachedColorModel
 def hueFillExceptMin(alpha):
   a = fillfloat(alpha,256)
   a[0] = 0.0
@@ -523,10 +603,14 @@ def makePointGroup(f,x1,x2,x3,cmin,cmax,cbar):
   return pg
 
 def plot3(f,g=None,k1=120,k2=298,k3=39,au=300,cmin=-2,cmax=2,
-          cmap=None,clab=None,cint=None,cells=None,samples=None,skinx=None,png=None):
-  n3 = len(f)
-  n2 = len(f[0])
-  n1 = len(f[0][0])
+          cmap=None,clab=None,cint=None,cells=None,samples=None,skinx=None,
+          dims=None,png=None):
+  if dims:
+    n1,n2,n3 = dims
+  else:
+    n3 = len(f)
+    n2 = len(f[0])
+    n1 = len(f[0][0])
   '''
   s1,s2,s3=Sampling(n1),Sampling(n2),Sampling(n3)
   d1,d2,d3 = s1.delta,s2.delta,s3.delta
@@ -622,10 +706,13 @@ def plot3(f,g=None,k1=120,k2=298,k3=39,au=300,cmin=-2,cmax=2,
       cbar.paintToPng(720,1,pngDir+png+"cbar.png")
 
 def plot3f(g,a=None,k1=120,k2=298,k3=39,amin=None,amax=None,
-          amap=jetRamp(1.0),alab="Voting score",aint=0.1, png=None):
-  n3 = len(g)
-  n2 = len(g[0])
-  n1 = len(g[0][0])
+          amap=jetRamp(1.0),alab="Voting score",aint=0.1,dims=None,png=None):
+  if dims:
+    n1,n2,n3 = dims
+  else:
+    n3 = len(g)
+    n2 = len(g[0])
+    n1 = len(g[0][0])
   s1 = Sampling(n1)
   s2 = Sampling(n2)
   s3 = Sampling(n3)
@@ -652,10 +739,10 @@ def plot3f(g,a=None,k1=120,k2=298,k3=39,amin=None,amax=None,
   pp.setInterval2(50)
   pp.setInterval3(50)
   if a:
-    pv12 = PixelsView(s1,s2,slice12(k3,a))
+    pv12 = PixelsView(s1,s2,a[k3])
     pv12.setOrientation(PixelsView.Orientation.X1DOWN_X2RIGHT)
     pv12.setInterpolation(PixelsView.Interpolation.NEAREST)
-    pv13 = PixelsView(s1,s3,slice13(k2,a))
+    pv13 = PixelsView(s1,s3,view13(k2,a))
     pv13.setOrientation(PixelsView.Orientation.X1DOWN_X2RIGHT)
     pv13.setInterpolation(PixelsView.Interpolation.NEAREST)
     pv23 = PixelsView(s2,s3,slice23(k1,a))
@@ -677,17 +764,11 @@ def plot3f(g,a=None,k1=120,k2=298,k3=39,amin=None,amax=None,
   if png and pngDir:
     pf.paintToPng(360,7.0,pngDir+png+".png")
 
-def slice12(k3,f):
-  n1,n2,n3 = len(f[0][0]),len(f[0]),len(f)
-  s = zerofloat(n1,n2)
-  SimpleFloat3(f).get12(n1,n2,0,0,k3,s)
-  return s
-
-def slice13(k2,f):
-  n1,n2,n3 = len(f[0][0]),len(f[0]),len(f)
-  s = zerofloat(n1,n3)
-  SimpleFloat3(f).get13(n1,n3,0,k2,0,s)
-  return s
+def view13(k2,f):
+  """
+  Returns an array of the rows f[i3][k2]; rows are not copied.
+  """
+  return jarray.array([f3[k2] for f3 in f],Class.forName("[F"))
 
 def slice23(k1,f):
   n1,n2,n3 = len(f[0][0]),len(f[0]),len(f)